@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+GpsLogIngest.py -- Pull a pile of T-LOGnnn.TXT dumps into one set of
+deduplicated, continuous tracks.
+Usage:
+    $ ./GpsLogIngest.py <trackDir> [T-LOGnnn.TXT ...]
+
+    The same card often gets copied more than once and the logger rotates
+    files, so the same fixes turn up in several files. Each fix is keyed by
+    its RMC date and time and only the first copy is kept. The survivors
+    are put in time order, cut into tracks wherever there is a long gap,
+    and joined onto any existing track they run into, before or after.
+
+    Each track is written to <trackDir>/TrackNNNNN.csv in the same format
+    as ParseNmea.SaveReducedGpsData, with distances recalculated along the
+    whole track, ready to load into GpsTrackProcessing. The keys seen so
+    far and the time span of every track are kept in <trackDir>/ingest.npz
+    so later runs only add what is new.
+
+Created on Mon Oct 19 2026
+
+@author: agent
+"""
+
+import bisect
+import datetime
+import hashlib
+import os
+import sys
+import numpy
+import ParseNmea
+
+EPOCH_ORDINAL = datetime.date(2000, 1, 1).toordinal()
+
+class GpsLogIngest:
+    """
+    A class to deduplicate and merge parsed GPS data from many log files.
+    New fixes are handed back as [trackNumber, gpsData] where gpsData uses
+    the same csv format as ParseNmea:
+        0: Timestamp (HHmmss.mmm)
+        1: latitude
+        2: longitude
+        3: altitude
+        4: distance (m)
+        5: number of satellites
+        6: gps quality
+        7: speed (knots)
+        8: course
+        9: datestamp (DDMMYY)
+    Fixes are keyed by milliseconds since 2000-01-01 from fields 9 and 0,
+    so a key is both the fingerprint of a fix and its place in time.
+    """
+
+    def __init__(self, trackDir=None, maxGapSeconds=300):
+        self.trackDir = trackDir   # where to write tracks, None to not
+        self.maxGapMs = int(maxGapSeconds * 1000)
+        self.seenFiles = set()     # digests of whole files already read
+        self.seenFixes = numpy.zeros(0, dtype=numpy.int64) # sorted keys from earlier runs
+        self.newFixes = set()      # keys added this run, merged in by SaveState
+        self.spans = []            # [trackNumber, firstKey, lastKey] sorted by time
+        self.trackCount = 0
+        self.duplicateFixes = 0
+        self.dayCache = {}         # datestamp -> days since 2000-01-01
+        self.parser = ParseNmea.ParseNmea()
+
+    def FileDigest(self, filename):
+        """
+        Hash the raw bytes of <filename> so an exact copy of a file can be
+        skipped without parsing it.
+        """
+        digest = hashlib.sha1()
+        with open(filename, 'rb') as theFile:
+            for block in iter(lambda: theFile.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def FixKey(self, csvLine):
+        """
+        Milliseconds since 2000-01-01 of a parsed fix, from
+        0: Timestamp (HHmmss.mmm)
+        9: datestamp (DDMMYY)
+        The same RMC instant gets the same key whichever parse it came
+        from. Return None if the date or time can't be read.
+        """
+        splitLine = csvLine.split(',')
+        try:
+            timestamp = splitLine[0]
+            datestamp = splitLine[9]
+            day = self.dayCache.get(datestamp)
+            if day is None:
+                day = datetime.date(2000 + int(datestamp[4:6]),
+                    int(datestamp[2:4]),
+                    int(datestamp[0:2])).toordinal() - EPOCH_ORDINAL
+                self.dayCache[datestamp] = day
+            milliseconds = int(timestamp[0:2]) * 3600000 + \
+                int(timestamp[2:4]) * 60000 + \
+                int(round(float(timestamp[4:]) * 1000))
+        except (ValueError, IndexError):
+            return None
+        return day * 86400000 + milliseconds
+
+    def AddNmeaFile(self, filename):
+        """
+        Parse NMEA log <filename> and merge any fixes not seen before.
+        The file is only recorded as ingested once its fixes are merged.
+        Return the new fixes (see AddGpsData).
+        """
+        fileDigest = self.FileDigest(filename)
+        if fileDigest in self.seenFiles:
+            print( "Already ingested a copy of %s, skipping" % filename)
+            return []
+
+        self.parser.ParseGpsNmeaFile(filename)
+        # Fall back to the just GPRMC format like GpsTrackProcessing does
+        if len(self.parser.gpsData) == 0:
+            self.parser.ParseGpsNmeaGprmcFile(filename)
+        if len(self.parser.gpsData) == 0:
+            print( "No fixes found in %s" % filename)
+            return []
+        tracks = self.AddGpsData(self.parser.gpsData)
+        self.seenFiles.add(fileDigest)
+        return tracks
+
+    def AddGpsData(self, gpsData):
+        """
+        Drop the csv lines of gpsData that have been seen before, in this
+        batch or an earlier one, and merge the rest into tracks. If there is
+        a trackDir the track files are updated too.
+        Return a list of [trackNumber, gpsData] for the new fixes, one entry
+        per run of fixes without a long gap. Distances are along that run.
+        """
+        keys = []
+        lines = []
+        for line in gpsData:
+            key = self.FixKey(line)
+            if key is None:
+                continue
+            keys.append(key)
+            lines.append(line)
+        if len(keys) == 0:
+            return []
+
+        # first copy of each key within the batch, in time order ...
+        [unique, firstIndex] = numpy.unique(numpy.array(keys, dtype=numpy.int64),
+                                            return_index=True)
+        # ... that is in neither the sorted keys from earlier runs ...
+        position = numpy.searchsorted(self.seenFixes, unique)
+        seen = numpy.zeros(len(unique), dtype=bool)
+        inRange = position < len(self.seenFixes)
+        seen[inRange] = self.seenFixes[position[inRange]] == unique[inRange]
+        # ... nor the keys added during this run
+        if len(self.newFixes) > 0:
+            seen |= numpy.fromiter((key in self.newFixes for key in unique.tolist()),
+                                   dtype=bool, count=len(unique))
+        unique = unique[~seen]
+        firstIndex = firstIndex[~seen]
+        self.duplicateFixes += len(keys) - len(unique)
+        self.newFixes.update(unique.tolist())
+
+        tracks = []
+        breaks = numpy.nonzero(numpy.diff(unique) > self.maxGapMs)[0] + 1
+        bounds = [0] + breaks.tolist() + [len(unique)]
+        for i in range(len(bounds) - 1):
+            [first, last] = [bounds[i], bounds[i + 1]]
+            if first == last:
+                continue
+            fragment = self.RecalcDistances([lines[j] for j in firstIndex[first:last]])
+            [trackNumber, absorbed] = self.JoinTrack(int(unique[first]),
+                                                     int(unique[last - 1]))
+            if self.trackDir is not None:
+                self.UpdateTrackFile(trackNumber, fragment, absorbed)
+            tracks.append([trackNumber, fragment])
+        return tracks
+
+    def JoinTrack(self, firstKey, lastKey):
+        """
+        Find the track for a run of fixes from firstKey to lastKey. Any
+        track that overlaps it or ends/starts within the gap limit of it is
+        joined; if it bridges several tracks they become one, keeping the
+        lowest track number. Otherwise a new track is started.
+        Return [trackNumber, absorbedTrackNumbers].
+        """
+        starts = [span[1] for span in self.spans]
+        index = bisect.bisect_right(starts, lastKey + self.maxGapMs)
+        # spans are kept apart by more than the gap, so their ends are in
+        # order too and the ones to join sit just before index
+        joined = []
+        while index > 0 and self.spans[index - 1][2] >= firstKey - self.maxGapMs:
+            index -= 1
+            joined.append(self.spans.pop(index))
+
+        if len(joined) == 0:
+            self.trackCount += 1
+            numbers = [self.trackCount]
+        else:
+            numbers = sorted(span[0] for span in joined)
+            firstKey = min([firstKey] + [span[1] for span in joined])
+            lastKey = max([lastKey] + [span[2] for span in joined])
+        self.spans.insert(index, [numbers[0], firstKey, lastKey])
+        return [numbers[0], numbers[1:]]
+
+    def RecalcDistances(self, gpsData):
+        """
+        Recalculate the distance field (4) along time ordered csv lines,
+        starting from 0 at the first fix.
+        """
+        result = []
+        lastLat = None
+        lastLon = None
+        for line in gpsData:
+            splitLine = line.split(',')
+            lat = float(splitLine[1])
+            lon = float(splitLine[2])
+            if lastLat is None:
+                distance = 0.0
+            else:
+                distance = self.parser.HaversineDistance(lat, lastLat, lon, lastLon)
+            splitLine[4] = "%f" % distance
+            result.append(','.join(splitLine))
+            lastLat = lat
+            lastLon = lon
+        return result
+
+    def TrackFilename(self, trackNumber):
+        return os.path.join(self.trackDir, "Track%05d.csv" % trackNumber)
+
+    def UpdateTrackFile(self, trackNumber, gpsData, absorbed):
+        """
+        Merge gpsData, the track file for trackNumber and the files of any
+        absorbed tracks into one time ordered track file, recalculating
+        distances along the whole track.
+        """
+        byKey = {}
+        for number in [trackNumber] + absorbed:
+            filename = self.TrackFilename(number)
+            if os.path.exists(filename):
+                reader = ParseNmea.ParseNmea()
+                reader.LoadReducedGpsData(filename)
+                for line in reader.gpsData:
+                    byKey.setdefault(self.FixKey(line), line)
+        for line in gpsData:
+            byKey.setdefault(self.FixKey(line), line)
+
+        writer = ParseNmea.ParseNmea()
+        writer.gpsData = self.RecalcDistances([byKey[key] for key in sorted(byKey)])
+        writer.SaveReducedGpsData(self.TrackFilename(trackNumber))
+        for number in absorbed:
+            filename = self.TrackFilename(number)
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def SaveState(self):
+        """
+        Return the file digests, fix keys and track spans as a dict of
+        arrays, to be written in the same file as whatever the fixes went
+        into so the two can't get out of step. The keys added this run are
+        merged into the sorted array here, once.
+        """
+        if len(self.newFixes) > 0:
+            newFixes = numpy.fromiter(self.newFixes, dtype=numpy.int64,
+                                      count=len(self.newFixes))
+            self.seenFixes = numpy.union1d(self.seenFixes, newFixes)
+            self.newFixes = set()
+        return {'seenFiles': numpy.array(sorted(self.seenFiles), dtype=str),
+                'seenFixes': self.seenFixes,
+                'trackCount': numpy.array(self.trackCount),
+                'trackSpans': numpy.array(self.spans, dtype=numpy.int64).reshape(-1, 3)}
+
+    def LoadState(self, saved):
+        """
+        Restore the state written by SaveState from a loaded .npz
+        """
+        self.seenFiles = set(saved['seenFiles'].tolist())
+        self.seenFixes = saved['seenFixes'].astype(numpy.int64)
+        self.newFixes = set()
+        self.trackCount = int(saved['trackCount'])
+        self.spans = saved['trackSpans'].tolist()
+
+    def Save(self, filename):
+        """
+        Save the ingest state to <filename> (numpy .npz format), through a
+        temp file moved into place. Left uncompressed; the keys are most of
+        it, and deflating them takes about 25x as long for a file only
+        about 3x smaller.
+        """
+        print( "Saving ingest state to %s" % filename)
+        tempFile = filename + '.tmp.npz'
+        numpy.savez(tempFile, **self.SaveState())
+        os.replace(tempFile, filename)
+
+    def Load(self, filename):
+        """
+        Load ingest state previously written by Save
+        """
+        print( "Loading ingest state from %s" % filename)
+        with numpy.load(filename) as saved:
+            self.LoadState(saved)
+
+def main():
+    trackDir = sys.argv[1]
+    if not os.path.isdir(trackDir):
+        os.makedirs(trackDir)
+    ingest = GpsLogIngest(trackDir)
+    stateFile = os.path.join(trackDir, 'ingest.npz')
+    if os.path.exists(stateFile):
+        ingest.Load(stateFile)
+
+    for filename in sys.argv[2:]:
+        for [trackNumber, gpsData] in ingest.AddNmeaFile(filename):
+            print( "  %d new fixes in %s" % \
+                (len(gpsData), ingest.TrackFilename(trackNumber)))
+    ingest.Save(stateFile)
+    print( "%d tracks, %d duplicate fixes dropped this run" % \
+        (len(ingest.spans), ingest.duplicateFixes))
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print( __doc__)
+        sys.exit()
+    main()
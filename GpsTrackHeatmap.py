@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+GpsTrackHeatmap.py -- Bin every fix from every track into a lat/long grid
+so the whole archive can be shown as a density map.
+Usage:
+    $ ./GpsTrackHeatmap.py <accumulator.npz> [T-LOGnnn.TXT ...]
+
+    Loads the accumulator (or starts a new one), adds the given log files,
+    saves the accumulator and plots it over the map image. Fixes are run
+    through GpsLogIngest first, with its state kept in the accumulator, so
+    files or fixes that were already counted are skipped. Scatter plotting
+    every point in the archive is far too slow, so only the binned counts
+    are kept around.
+
+Created on Mon Oct 19 2026
+
+@author: agent
+"""
+
+import os
+import sys
+import numpy
+import ParseNmea
+import GpsLogIngest
+
+class GpsTrackHeatmap:
+    """
+    A class to accumulate GPS fixes into a grid of lat/long cells covering
+    the whole globe.
+
+    Cells are cellSize decimal degrees square, counted from (-90, -180), so
+    row 0 is the southern most row and column 0 the western most column.
+    Only tiles of tileSize x tileSize cells that actually have fixes in them
+    are stored. Counts are kept between runs with Save/Load so new log
+    files are just added to the existing counts.
+    """
+
+    def __init__(self, cellSize=0.0002, tileSize=256):
+        self.cellSize = cellSize
+        self.tileSize = tileSize
+        self.numRows = int(numpy.ceil(180.0 / cellSize))
+        self.numCols = int(numpy.ceil(360.0 / cellSize))
+        self.tiles = {}            # (tileRow, tileCol) -> counts
+
+    def AddLatsAndLongs(self, lats, longs):
+        """
+        Add arrays of latitude and longitude (decimal degrees) to the grid.
+        Points are binned with one unbuffered add per tile they land in, so
+        the cost goes with the number of points, not the grid size.
+        """
+        lats = numpy.asarray(lats, dtype=float)
+        longs = numpy.asarray(longs, dtype=float)
+        valid = numpy.isfinite(lats) & numpy.isfinite(longs)
+        rows = numpy.clip(numpy.floor((lats[valid] + 90.0) / self.cellSize),
+                          0, self.numRows - 1).astype(numpy.int64)
+        cols = numpy.floor((longs[valid] + 180.0) / self.cellSize).astype(numpy.int64)
+        cols = numpy.mod(cols, self.numCols)
+        tileKeys = (rows // self.tileSize) * self.numCols + cols // self.tileSize
+        [uniqueKeys, inverse] = numpy.unique(tileKeys, return_inverse=True)
+        for i in range(len(uniqueKeys)):
+            key = divmod(int(uniqueKeys[i]), self.numCols)
+            if key not in self.tiles:
+                self.tiles[key] = numpy.zeros((self.tileSize, self.tileSize),
+                                              dtype=numpy.uint32)
+            inTile = inverse == i
+            numpy.add.at(self.tiles[key],
+                (rows[inTile] % self.tileSize, cols[inTile] % self.tileSize), 1)
+
+    def AddGpsData(self, gpsData):
+        """
+        Add a list of CSV lines of GPS data (see ParseNmea) to the grid.
+        Fields used are:
+        1: latitude
+        2: longitude
+        """
+        if len(gpsData) == 0:
+            return
+        latLongs = numpy.array([line.split(',', 3)[1:3] for line in gpsData],
+                               dtype=float)
+        self.AddLatsAndLongs(latLongs[:, 0], latLongs[:, 1])
+
+    def AddNmeaFile(self, filename):
+        """
+        Parse NMEA log <filename> and add its fixes to the grid. Nothing is
+        deduplicated here; main goes through GpsLogIngest for that.
+        """
+        parser = ParseNmea.ParseNmea()
+        parser.ParseGpsNmeaFile(filename)
+        # Fall back to the just GPRMC format like GpsTrackProcessing does
+        if len(parser.gpsData) == 0:
+            parser.ParseGpsNmeaGprmcFile(filename)
+        self.AddGpsData(parser.gpsData)
+
+    def TotalCount(self):
+        """
+        Total number of fixes in the grid
+        """
+        return sum(int(tile.sum()) for tile in self.tiles.values())
+
+    def Save(self, filename, **extraArrays):
+        """
+        Save the accumulator to <filename> (numpy .npz format), along with
+        any extraArrays that need to stay in step with the counts. Written to
+        a temp file first and moved into place so a failed save leaves the
+        old accumulator alone.
+        """
+        print( "Saving heatmap to %s" % filename)
+        keys = sorted(self.tiles)
+        tempFile = filename + '.tmp.npz'
+        numpy.savez_compressed(tempFile,
+            grid=numpy.array([self.cellSize, self.tileSize]),
+            tileKeys=numpy.array(keys, dtype=numpy.int64).reshape(-1, 2),
+            tiles=numpy.array([self.tiles[key] for key in keys],
+                dtype=numpy.uint32).reshape(-1, self.tileSize, self.tileSize),
+            **extraArrays)
+        os.replace(tempFile, filename)
+
+    def Load(self, filename):
+        """
+        Load an accumulator previously written by Save
+        """
+        print( "Loading heatmap from %s" % filename)
+        with numpy.load(filename) as saved:
+            [self.cellSize, tileSize] = saved['grid'].tolist()
+            self.tileSize = int(tileSize)
+            self.numRows = int(numpy.ceil(180.0 / self.cellSize))
+            self.numCols = int(numpy.ceil(360.0 / self.cellSize))
+            tiles = saved['tiles']
+            self.tiles = {}
+            for i, key in enumerate(saved['tileKeys'].tolist()):
+                self.tiles[tuple(key)] = tiles[i].astype(numpy.uint32)
+
+    def GetCounts(self, BLX, TRX, BLY, TRY, maxCells=1000):
+        """
+        Sum the counts over the extent given by the bottom left (BLX, BLY)
+        and top right (TRX, TRY) longitude/latitude. If the extent is wider
+        than maxCells in either direction, blocks of neighbouring cells are
+        summed together (the last partial block is padded with zeros) so any
+        extent renders at a sensible resolution. Only stored tiles are
+        visited.
+        Return [counts, extent] where extent is [BLX, TRX, BLY, TRY] snapped
+        to the cells actually used, ready for imshow. Return [None, None] if
+        there are no fixes inside the extent.
+        """
+        row0 = self.ClampIndex((BLY + 90.0) / self.cellSize, numpy.floor, self.numRows)
+        row1 = self.ClampIndex((TRY + 90.0) / self.cellSize, numpy.ceil, self.numRows)
+        col0 = self.ClampIndex((BLX + 180.0) / self.cellSize, numpy.floor, self.numCols)
+        col1 = self.ClampIndex((TRX + 180.0) / self.cellSize, numpy.ceil, self.numCols)
+        if row1 <= row0 or col1 <= col0:
+            return [None, None]
+
+        factor = max(int(numpy.ceil(max(row1 - row0, col1 - col0) / float(maxCells))), 1)
+        numRows = -(-(row1 - row0) // factor)
+        numCols = -(-(col1 - col0) // factor)
+        counts = numpy.zeros((numRows, numCols), dtype=numpy.uint64)
+        haveData = False
+        for [tileRow, tileCol] in self.tiles:
+            # cells of this tile that fall inside the extent
+            r0 = max(tileRow * self.tileSize, row0)
+            r1 = min((tileRow + 1) * self.tileSize, row1)
+            c0 = max(tileCol * self.tileSize, col0)
+            c1 = min((tileCol + 1) * self.tileSize, col1)
+            if r1 <= r0 or c1 <= c0:
+                continue
+            haveData = True
+            tile = self.tiles[(tileRow, tileCol)]
+            window = tile[r0 - tileRow * self.tileSize:r1 - tileRow * self.tileSize,
+                          c0 - tileCol * self.tileSize:c1 - tileCol * self.tileSize]
+            outRows = (numpy.arange(r0, r1) - row0) // factor
+            outCols = (numpy.arange(c0, c1) - col0) // factor
+            numpy.add.at(counts, (outRows[:, None], outCols[None, :]), window)
+        if not haveData:
+            return [None, None]
+
+        extent = [col0 * self.cellSize - 180.0,
+                  (col0 + numCols * factor) * self.cellSize - 180.0,
+                  row0 * self.cellSize - 90.0,
+                  (row0 + numRows * factor) * self.cellSize - 90.0]
+        return [counts, extent]
+
+    def ClampIndex(self, cell, rounding, numCells):
+        """
+        Round a fractional cell position and clamp it to 0..numCells
+        """
+        return min(max(int(rounding(cell)), 0), numCells)
+
+def main():
+    import matplotlib.pyplot as plt
+    import GpsTrackProcessing
+
+    accumulatorFile = sys.argv[1]
+    heatmap = GpsTrackHeatmap()
+    # the ingest state lives in the accumulator so the fixes marked as seen
+    # are always the ones that were counted
+    ingest = GpsLogIngest.GpsLogIngest()
+    if os.path.exists(accumulatorFile):
+        heatmap.Load(accumulatorFile)
+        with numpy.load(accumulatorFile) as saved:
+            if 'seenFixes' in saved.files:
+                ingest.LoadState(saved)
+            else:
+                print( "No ingest state in %s, fixes already counted may be counted again" % \
+                    accumulatorFile)
+
+    for filename in sys.argv[2:]:
+        for [trackNumber, gpsData] in ingest.AddNmeaFile(filename):
+            heatmap.AddGpsData(gpsData)
+    # kept compressed like the tiles; the keys are sorted times and shrink
+    # to about a third, at some cost in save time
+    heatmap.Save(accumulatorFile, **ingest.SaveState())
+    print( "Heatmap holds %d fixes in %d tiles" % \
+        (heatmap.TotalCount(), len(heatmap.tiles)))
+
+    GpsTrackProcessing.PlotHeatmap(heatmap, False)
+    plt.show()
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print( __doc__)
+        sys.exit()
+    main()
@@ -32,6 +32,7 @@ only interested in the GPGGA GPS fix data and the GPRMC:
    http://aprs.gids.nl/nmea
 """
 import sys
+import numpy
 import matplotlib.pyplot as plt
 import tkinter as tk
 from tkinter import filedialog
@@ -127,7 +128,13 @@ def PlotAnnotatedTrack(gpsData, annotation, IsCommute, stats):
     plt.ylabel('Latitude')
     plt.title('POSITION (in Decimal Degrees)')
 
-	#lay the image under the graph
+    PlotMapBackground(IsCommute)
+
+def PlotMapBackground(IsCommute):
+    """
+    Lay the map image under the graph. Return the extent of the image as
+    [BLX, TRX, BLY, TRY].
+    """
 	#read a png file to map on
     if IsCommute:
         im = plt.imread('Image/Comute1.png')
@@ -148,6 +155,28 @@ def PlotAnnotatedTrack(gpsData, annotation, IsCommute, stats):
         BLY = 38.8717             #bottom left latitude
     #adjust these values based on your location and map, lat and long are in decimal degrees
     plt.imshow(im,extent=[BLX, TRX, BLY, TRY])
+    return [BLX, TRX, BLY, TRY]
+
+def PlotHeatmap(heatmap, IsCommute):
+    """
+    Plot the fix density from a GpsTrackHeatmap accumulator over the map
+    image. Only the counts inside the map extent are drawn.
+    """
+    [BLX, TRX, BLY, TRY] = PlotMapBackground(IsCommute)
+    [counts, extent] = heatmap.GetCounts(BLX, TRX, BLY, TRY)
+    if counts is None:
+        print( "No heatmap data inside the map extent")
+        return
+    # log scale so a few busy spots don't wash out everything else
+    density = numpy.ma.masked_equal(counts, 0)
+    plt.imshow(numpy.ma.log10(density), extent=extent, origin='lower',
+        cmap='hot', alpha=0.6, interpolation='nearest')
+    plt.colorbar(label='log10(fixes per cell)')
+    plt.xlim(BLX, TRX)
+    plt.ylim(BLY, TRY)
+    plt.xlabel('Longitude')
+    plt.ylabel('Latitude')
+    plt.title('FIX DENSITY (in Decimal Degrees)')
 
 def BoundingBoxContainsCommute(bbox):
     """
@@ -200,16 +229,21 @@ def main():
     # select an input file
     #root = tk.Tk()
     #root.withdraw()
-    inputFile = filedialog.askopenfilename(filetypes=[("text files", "*.TXT")])
+    inputFile = filedialog.askopenfilename(filetypes=[("text files", "*.TXT"),
+        ("merged tracks", "*.csv")])
 
-    parser.ParseGpsNmeaFile(inputFile)
-    # If the gpsData is length zero the file was not in the
-    # GPGGA, GPRMC pair format. Try the just GPRMC format
-    if len(parser.gpsData) == 0:
-        parser.ParseGpsNmeaGprmcFile(sys.argv[1])
+    if inputFile.lower().endswith('.csv'):
+        # Track already merged and deduplicated by GpsLogIngest
+        parser.LoadReducedGpsData(inputFile)
+    else:
+        parser.ParseGpsNmeaFile(inputFile)
+        # If the gpsData is length zero the file was not in the
+        # GPGGA, GPRMC pair format. Try the just GPRMC format
         if len(parser.gpsData) == 0:
-            print("Error parsing data. Fix input file?")
-            exit
+            parser.ParseGpsNmeaGprmcFile(inputFile)
+    if len(parser.gpsData) == 0:
+        print("Error parsing data. Fix input file?")
+        exit
 
     # make a local copy of the GPS data
     gpsData = parser.gpsData
@@ -145,6 +145,19 @@ class ParseNmea:
             csv_file.write(line + "\n")
         csv_file.close()
         
+    def LoadReducedGpsData(self, filename):
+        """
+        Read GPS data previously written by SaveReducedGpsData from
+        <filename>, skipping the header line
+        """
+        print( "Loading GPS data from %s" % filename)
+        self.gpsData = []
+        for line in open(filename,'r'):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            self.gpsData.append(line)
+        
     def DoNotHaveFix(self, latitude):
         """
         Check to make sure the lat is populated, indicating have satelites
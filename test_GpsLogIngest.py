@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for GpsLogIngest using made up csv lines in the ParseNmea format.
+
+@author: agent
+"""
+
+import os
+import numpy
+import GpsLogIngest
+import GpsTrackHeatmap
+import ParseNmea
+
+def MakeLine(hhmmss, lat=38.8887, lon=-77.0281, alt="3.4", date="270915"):
+    return "%s.000,%f,%f,%s,0.000000,07,1,2.53,275.91,%s" % \
+        (hhmmss, lat, lon, alt, date)
+
+def MakeTrack(startSeconds, endSeconds, step=5):
+    """ Lines every <step> seconds between two times of day, moving north """
+    lines = []
+    for seconds in range(startSeconds, endSeconds + 1, step):
+        hhmmss = "%02d%02d%02d" % (seconds // 3600, (seconds // 60) % 60, seconds % 60)
+        lines.append(MakeLine(hhmmss, lat=38.8 + seconds * 1e-5))
+    return lines
+
+def Hours(hours, minutes=0):
+    return hours * 3600 + minutes * 60
+
+def FixCount(tracks):
+    return sum(len(gpsData) for [trackNumber, gpsData] in tracks)
+
+def test_FixKey():
+    ingest = GpsLogIngest.GpsLogIngest()
+    # 2000-01-02 00:00:01.5
+    assert ingest.FixKey("000001.500,38.8,-77.0,0,0.0,07,1,0.0,0.0,020100") == 86401500
+    assert ingest.FixKey("173540.000,38.8,-77.0,0,0.0,1?,?,2.53,275.91,") is None
+    assert ingest.FixKey("garbage") is None
+
+def test_SameInstantFromEitherParseIsOneFix():
+    ingest = GpsLogIngest.GpsLogIngest()
+    ggaVersion = MakeLine("173540")
+    rmcVersion = "173540.000,38.888700,-77.028100,0,0.000000,1?,?,2.53,275.91,270915"
+    tracks = ingest.AddGpsData([ggaVersion, rmcVersion, ggaVersion])
+    assert FixCount(tracks) == 1
+    assert tracks[0][1][0].split(',')[3] == "3.4" # first copy kept
+    assert ingest.duplicateFixes == 2
+    assert FixCount(ingest.AddGpsData([rmcVersion])) == 0
+    assert ingest.duplicateFixes == 3
+
+def test_DuplicatesAcrossRunsDropped():
+    ingest = GpsLogIngest.GpsLogIngest()
+    ingest.AddGpsData(MakeTrack(Hours(10), Hours(11)))
+    ingest.SaveState()
+    assert len(ingest.seenFixes) == 721
+    assert len(ingest.newFixes) == 0
+    tracks = ingest.AddGpsData(MakeTrack(Hours(10, 30), Hours(11, 30)))
+    assert FixCount(tracks) == 360
+    assert len(ingest.spans) == 1
+
+def test_SplitAtLongGaps():
+    ingest = GpsLogIngest.GpsLogIngest(maxGapSeconds=300)
+    lines = MakeTrack(Hours(10), Hours(10, 10)) + MakeTrack(Hours(10, 20), Hours(10, 30))
+    tracks = ingest.AddGpsData(lines[::-1])
+    assert [trackNumber for [trackNumber, gpsData] in tracks] == [1, 2]
+    assert [len(gpsData) for [trackNumber, gpsData] in tracks] == [121, 121]
+    # time ordered with distance starting over at each track
+    assert tracks[0][1][0].startswith("100000")
+    assert float(tracks[1][1][0].split(',')[4]) == 0.0
+    assert float(tracks[1][1][1].split(',')[4]) > 0.0
+
+def test_EarlierOverlappingDumpJoinsTrack():
+    ingest = GpsLogIngest.GpsLogIngest()
+    ingest.AddGpsData(MakeTrack(Hours(10), Hours(11)))
+    tracks = ingest.AddGpsData(MakeTrack(Hours(9, 30), Hours(11, 30)))
+    # 09:30-10:00 goes on the front, 11:00-11:30 on the back, both track 1
+    assert [trackNumber for [trackNumber, gpsData] in tracks] == [1, 1]
+    assert FixCount(tracks) == 720
+    assert ingest.spans == [[1, ingest.FixKey(MakeLine("093000")),
+                                ingest.FixKey(MakeLine("113000"))]]
+
+def test_FragmentBridgingTwoTracksMergesThem():
+    ingest = GpsLogIngest.GpsLogIngest()
+    ingest.AddGpsData(MakeTrack(Hours(12), Hours(13)))
+    ingest.AddGpsData(MakeTrack(Hours(10), Hours(11)))
+    assert [span[0] for span in ingest.spans] == [2, 1]
+    tracks = ingest.AddGpsData(MakeTrack(Hours(11), Hours(12)))
+    assert [trackNumber for [trackNumber, gpsData] in tracks] == [1]
+    assert len(ingest.spans) == 1
+    assert ingest.spans[0][0] == 1
+
+def test_SaveStateAndLoadState(tmp_path):
+    ingest = GpsLogIngest.GpsLogIngest()
+    ingest.seenFiles.add("abc123")
+    ingest.AddGpsData(MakeTrack(Hours(10), Hours(10, 10)))
+    ingest.AddGpsData(MakeTrack(Hours(12), Hours(12, 10)))
+    filename = str(tmp_path / "ingest.npz")
+    ingest.Save(filename)
+
+    loaded = GpsLogIngest.GpsLogIngest()
+    loaded.Load(filename)
+    assert loaded.seenFiles == set(["abc123"])
+    assert numpy.array_equal(loaded.seenFixes, ingest.seenFixes)
+    assert loaded.spans == ingest.spans
+    assert loaded.trackCount == 2
+    # fixes carrying on from a saved track join it, old ones are dropped
+    tracks = loaded.AddGpsData(MakeTrack(Hours(10, 5), Hours(10, 15)))
+    assert [trackNumber for [trackNumber, gpsData] in tracks] == [1]
+    assert FixCount(tracks) == 60
+
+def test_TrackFilesAreMergedAndContinuous(tmp_path):
+    ingest = GpsLogIngest.GpsLogIngest(str(tmp_path))
+    ingest.AddGpsData(MakeTrack(Hours(12), Hours(13)))
+    ingest.AddGpsData(MakeTrack(Hours(10), Hours(11)))
+    assert os.path.exists(ingest.TrackFilename(2))
+    ingest.AddGpsData(MakeTrack(Hours(11), Hours(12)))
+    assert not os.path.exists(ingest.TrackFilename(2))
+
+    reader = ParseNmea.ParseNmea()
+    reader.LoadReducedGpsData(ingest.TrackFilename(1))
+    assert len(reader.gpsData) == 3 * 720 + 1
+    keys = [ingest.FixKey(line) for line in reader.gpsData]
+    assert keys == sorted(set(keys))
+    distances = [float(line.split(',')[4]) for line in reader.gpsData]
+    assert distances[0] == 0.0
+    assert min(distances[1:]) > 0.0
+
+def test_FileOnlyRecordedAfterFixesMerged(tmp_path):
+    ingest = GpsLogIngest.GpsLogIngest()
+    empty = tmp_path / "T-LOG001.TXT"
+    empty.write_text("\n")
+    assert ingest.AddNmeaFile(str(empty)) == []
+    assert len(ingest.seenFiles) == 0
+
+def test_CopyOfIngestedFileSkipped(tmp_path):
+    ingest = GpsLogIngest.GpsLogIngest()
+    original = tmp_path / "T-LOG001.TXT"
+    original.write_text("$GPRMC,173535.000,A,3853.3253,N,07701.6814,W,2.36,285.03,270915,,,A*79\n")
+    copy = tmp_path / "T-LOG002.TXT"
+    copy.write_bytes(original.read_bytes())
+    ingest.seenFiles.add(ingest.FileDigest(str(original)))
+    assert ingest.AddNmeaFile(str(copy)) == []
+
+def test_StateSavedWithHeatmap(tmp_path):
+    ingest = GpsLogIngest.GpsLogIngest()
+    heatmap = GpsTrackHeatmap.GpsTrackHeatmap()
+    for [trackNumber, gpsData] in ingest.AddGpsData(MakeTrack(Hours(10), Hours(11))):
+        heatmap.AddGpsData(gpsData)
+    filename = str(tmp_path / "heatmap.npz")
+    heatmap.Save(filename, **ingest.SaveState())
+
+    loadedHeatmap = GpsTrackHeatmap.GpsTrackHeatmap()
+    loadedHeatmap.Load(filename)
+    loadedIngest = GpsLogIngest.GpsLogIngest()
+    with numpy.load(filename) as saved:
+        loadedIngest.LoadState(saved)
+    for [trackNumber, gpsData] in loadedIngest.AddGpsData(MakeTrack(Hours(10), Hours(11, 30))):
+        loadedHeatmap.AddGpsData(gpsData)
+    assert loadedHeatmap.TotalCount() == 721 + 360
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for GpsTrackHeatmap using made up fixes on a coarse grid.
+
+@author: agent
+"""
+
+import numpy
+import GpsTrackHeatmap
+
+def MakeHeatmap():
+    # 0.25 degree cells in 4 x 4 cell (1 degree) tiles
+    return GpsTrackHeatmap.GpsTrackHeatmap(cellSize=0.25, tileSize=4)
+
+def test_OnlyTouchedTilesAreStored():
+    heatmap = MakeHeatmap()
+    heatmap.AddLatsAndLongs([38.1, 38.2, 51.5], [-77.1, -77.1, -0.1])
+    assert len(heatmap.tiles) == 2
+    assert heatmap.TotalCount() == 3
+    # 38.1 -> row (128.1 / 0.25) = 512, tile row 128, cell 0
+    # -77.1 -> col (102.9 / 0.25) = 411, tile col 102, cell 3
+    assert heatmap.tiles[(128, 102)][0, 3] == 2
+
+def test_AddGpsData():
+    heatmap = MakeHeatmap()
+    heatmap.AddGpsData([
+        "173540.000,38.888745,-77.028107,3.4,0.000000,07,1,2.53,275.91,270915",
+        "173545.000,38.888745,-77.028187,4.7,6.900000,07,1,2.59,285.04,270915"])
+    assert heatmap.TotalCount() == 2
+
+def test_GetCountsFullResolution():
+    heatmap = MakeHeatmap()
+    heatmap.AddLatsAndLongs([38.1, 38.6, 38.6], [-77.1, -77.1, -76.9])
+    [counts, extent] = heatmap.GetCounts(-77.2, -76.8, 38.0, 38.7)
+    assert counts.shape == (3, 2)
+    assert counts.sum() == 3
+    assert counts[0, 0] == 1
+    assert counts[2, 0] == 1
+    assert counts[2, 1] == 1
+    assert extent == [-77.25, -76.75, 38.0, 38.75]
+
+def test_GetCountsSumsAndPadsBlocks():
+    heatmap = MakeHeatmap()
+    lats = numpy.array([0.1, 0.1, 0.3, 0.6])
+    longs = numpy.array([0.1, 0.6, 0.1, 0.1])
+    heatmap.AddLatsAndLongs(lats, longs)
+    # 3 x 3 cells summed in 2 x 2 blocks -> 2 x 2 with the last block padded
+    [counts, extent] = heatmap.GetCounts(0.0, 0.75, 0.0, 0.75, maxCells=2)
+    assert counts.shape == (2, 2)
+    assert counts[0, 0] == 2
+    assert counts[0, 1] == 1
+    assert counts[1, 0] == 1
+    assert extent == [0.0, 1.0, 0.0, 1.0]
+
+def test_GetCountsThinWindowIsNotEmpty():
+    heatmap = MakeHeatmap()
+    heatmap.AddLatsAndLongs([0.1], [10.1])
+    # 1 row by 100 columns squashed to at most 10 cells
+    [counts, extent] = heatmap.GetCounts(0.0, 25.0, 0.0, 0.25, maxCells=10)
+    assert counts.shape == (1, 10)
+    assert counts.sum() == 1
+
+def test_GetCountsNoData():
+    heatmap = MakeHeatmap()
+    heatmap.AddLatsAndLongs([38.1], [-77.1])
+    assert heatmap.GetCounts(10.0, 11.0, 10.0, 11.0) == [None, None]
+    # off the edge of the world
+    assert heatmap.GetCounts(190.0, 200.0, 95.0, 100.0) == [None, None]
+
+def test_SaveAndLoad(tmp_path):
+    heatmap = MakeHeatmap()
+    heatmap.AddLatsAndLongs([38.1, 51.5], [-77.1, -0.1])
+    filename = str(tmp_path / "heatmap.npz")
+    heatmap.Save(filename)
+
+    loaded = GpsTrackHeatmap.GpsTrackHeatmap()
+    loaded.Load(filename)
+    assert loaded.cellSize == 0.25
+    assert loaded.tileSize == 4
+    assert sorted(loaded.tiles) == sorted(heatmap.tiles)
+    loaded.AddLatsAndLongs([38.1], [-77.1])
+    assert loaded.TotalCount() == 3
+
+def test_SaveWithoutSuffix(tmp_path):
+    heatmap = MakeHeatmap()
+    heatmap.AddLatsAndLongs([38.1], [-77.1])
+    filename = str(tmp_path / "heatmap")
+    heatmap.Save(filename)
+    loaded = MakeHeatmap()
+    loaded.Load(filename)
+    assert loaded.TotalCount() == 1